@@ -1,6 +1,7 @@
 import argparse
 import logging
 import sys
+from functools import lru_cache
 from pathlib import Path
 
 from .input_handlers import ResolveSource
@@ -10,8 +11,12 @@ from .types import ProviderExtensions, TLSVersion
 logger = logging.getLogger(__name__)
 
 
-def cli() -> None:
-    """Main command-line entry point into the program. Parses options and invokes the rest of the program."""
+@lru_cache(maxsize=None)
+def _parser() -> argparse.ArgumentParser:
+    """Returns the command-line parser, which is only built the first time it is needed.
+
+    :return: The parser for the program's arguments.
+    """
     parser = argparse.ArgumentParser(description="Harden OpenVPN profiles from popular providers")
     parser.add_argument("source", help="Path or HTTP to zip file containing original OpenVPN profiles")
     parser.add_argument("dest", type=Path, help="Path to output file or directory")
@@ -24,7 +29,12 @@ def cli() -> None:
     group = parser.add_mutually_exclusive_group()
     group.add_argument("--pia", default=False, action="store_true", help="Add Private Internet Access fixes/hardening")
 
-    args = parser.parse_args()
+    return parser
+
+
+def cli() -> None:
+    """Main command-line entry point into the program. Parses options and invokes the rest of the program."""
+    args = _parser().parse_args()
 
     logging.basicConfig(
         level=getattr(logging, args.logging), format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -37,7 +47,7 @@ def cli() -> None:
 
     try:
         with ResolveSource(args.source) as src:
-            process_profiles(src, args.dest, TLSVersion(args.min_tls), provider_extensions)
+            process_profiles(src, args.dest, TLSVersion.from_value(args.min_tls), provider_extensions)
             sys.exit(0)
     except Exception as exc:
         logging.critical("Failed processing source", exc_info=exc)
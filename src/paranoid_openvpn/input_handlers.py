@@ -1,47 +1,116 @@
+import atexit
+import io
 import logging
 import os
-import re
 import shutil
-import sys
 import tempfile
 import urllib.request
+import uuid
 import warnings
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import ExitStack
+from functools import lru_cache
 from pathlib import Path
 from types import TracebackType
-from typing import Optional, Type, Union
+from typing import IO, Final, Literal, Optional, Sequence, Type, Union
 
-if sys.version_info >= (3, 8):
-    from typing import Final, Literal
-else:
-    from typing_extensions import Final, Literal  # pragma: no cover
+logger = logging.getLogger(__name__)
 
 
-logger = logging.getLogger(__name__)
+CHUNK_SIZE: Final = 1024 * 1024
+HTTP_SCHEMES: Final = ("http://", "https://")
+# Remote ZIP files up to this size are kept in memory rather than being written to a temporary file
+MAX_IN_MEMORY_DOWNLOAD: Final = 64 * 1024 * 1024
+# Below this many members, extracting serially is cheaper than starting a pool of extraction threads
+MIN_PARALLEL_MEMBERS: Final = 16
+# Local file header, end of central directory (empty archive), and spanned archive markers
+ZIP_SIGNATURES: Final = (b"PK\x03\x04", b"PK\x05\x06", b"PK\x07\x08")
+
+
+@lru_cache(maxsize=None)
+def _download_dir() -> Path:
+    """Returns the directory that downloads are temporarily saved in for the life of the process.
+
+    The directory is created on first use and removed when the interpreter exits, even if a download was not cleaned
+    up.
+
+    :return: Path to the process-wide download directory.
+    """
+    download_dir = Path(tempfile.mkdtemp(prefix="paranoid-openvpn-"))
+    atexit.register(shutil.rmtree, download_dir, ignore_errors=True)
+    return download_dir
+
 
+def _is_zip(src: Path) -> bool:
+    """Returns whether `src` looks like a ZIP file based on its leading signature.
 
-CHUNK_SIZE: Final = 8192
+    This avoids parsing the central directory of files that are clearly not ZIP files. ZIP files with leading data, such
+    as self-extracting archives, do not start with a signature and are therefore handled as plain files.
+
+    :param src: Path to the file to test.
+    :return: Whether the file starts with a ZIP signature.
+    """
+    with src.open("rb") as f_in:
+        return f_in.read(4) in ZIP_SIGNATURES
 
 
 class HandleZip:
     """Context manager that transparently extracts ZIP files to a temporary location."""
 
-    def __init__(self, src: Path) -> None:
+    def __init__(self, src: Union[Path, IO[bytes]]) -> None:
         """Extracts the input ZIP file to a temporary location.
 
-        :param src: Path to the input ZIP file.
+        :param src: Path to the input ZIP file or a binary file-like object containing it.
         """
         self.temp_dir = Path(tempfile.mkdtemp())
 
         try:
-            with zipfile.ZipFile(src) as f_in:
-                f_in.extractall(self.temp_dir)
-                logger.debug("Zip file extracted temporarily to %s", self.temp_dir)
+            # Every extraction worker opens the archive itself, so in-memory archives are shared as immutable bytes
+            # rather than as one file object whose position the workers would fight over
+            if isinstance(src, Path):
+                self._src: Union[Path, bytes] = src
+            else:
+                src.seek(0)
+                self._src = src.read()
+
+            with self._open() as f_in:
+                members = f_in.infolist()
+                if len(members) < MIN_PARALLEL_MEMBERS:
+                    f_in.extractall(self.temp_dir)
+
+            if len(members) >= MIN_PARALLEL_MEMBERS:
+                # Decompress in parallel as zlib releases the GIL. ZipFile objects are not thread-safe, so each worker
+                # gets its own over a disjoint slice of the members.
+                workers = min(os.cpu_count() or 1, len(members))
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    for _ in executor.map(self._extract_members, [members[i::workers] for i in range(workers)]):
+                        pass
+            logger.debug("Zip file extracted temporarily to %s", self.temp_dir)
         except Exception:
             shutil.rmtree(self.temp_dir)
             raise
 
+    def _open(self) -> zipfile.ZipFile:
+        """Opens a new, independent handle to the source ZIP file.
+
+        :return: The opened ZIP file.
+        """
+        return zipfile.ZipFile(self._src if isinstance(self._src, Path) else io.BytesIO(self._src))
+
+    def _extract_members(self, members: Sequence[zipfile.ZipInfo]) -> None:
+        """Extracts some of the members of the source ZIP file to the temporary location.
+
+        :param members: The members to extract.
+        """
+        with self._open() as zip_file:
+            for member in members:
+                try:
+                    zip_file.extract(member, self.temp_dir)
+                except FileExistsError:
+                    # Another worker created one of the member's parent directories first, it now exists so try again
+                    zip_file.extract(member, self.temp_dir)
+
     def __enter__(self) -> Path:
         """Context manager __enter__ function.
 
@@ -60,13 +129,17 @@ class HandleZip:
 class HandleDownload:
     """Context manager that transparently downloads remote files to a temporary location."""
 
-    def __init__(self, url: str) -> None:
+    def __init__(self, url: str, max_memory_size: int = 0) -> None:
         """Downloads the resource given by `url`.
 
+        If the server reports a size no larger than `max_memory_size` and the downloaded resource is a ZIP file, it is
+        kept in memory instead of being written to a temporary file.
+
         :param url: URL to download.
+        :param max_memory_size: Largest ZIP file, in bytes, to keep in memory. 0 always writes a temporary file.
         :raises ValueError: Raised for non-HTTP(S) URLs and if the download fails.
         """
-        if not (url.startswith("http://") or url.startswith("https://")):
+        if not url.startswith(HTTP_SCHEMES):
             raise ValueError("Can only download files via HTTP")
 
         if url.startswith("http://"):
@@ -77,35 +150,60 @@ class HandleDownload:
         if resp.code != 200:
             raise ValueError(f"Could not download remote file, HTTP error code: {resp.code}")
 
-        fd, file_name = tempfile.mkstemp()
-        os.close(fd)
-        self.temp_file = Path(file_name)
+        self.temp_file: Optional[Path] = None
+        self.downloaded: Union[Path, io.BytesIO]
+
+        content_length = resp.headers.get("Content-Length") if max_memory_size else None
+        if content_length and content_length.isdigit() and int(content_length) <= max_memory_size:
+            data = io.BytesIO()
+            shutil.copyfileobj(resp, data, CHUNK_SIZE)
+
+            data.seek(0)
+            # The central directory is checked as well so that a file which only starts like a ZIP file still ends up
+            # on disk, where ResolveSource handles it as a plain file
+            if data.read(4) in ZIP_SIGNATURES and zipfile.is_zipfile(data):
+                data.seek(0)
+                self.downloaded = data
+                logger.debug("Downloaded ZIP file kept in memory")
+            else:
+                # Only ZIP files can be consumed from memory, everything else needs to be on disk
+                data.seek(0)
+                self.downloaded = self._save(data)
+        else:
+            self.downloaded = self._save(resp)
+
+    def _save(self, src: IO[bytes]) -> Path:
+        """Writes the downloaded contents to a temporary file.
+
+        :param src: Binary file-like object to read the downloaded contents from.
+        :return: Path to the temporary file.
+        """
+        self.temp_file = _download_dir() / f"dl-{uuid.uuid4().hex}"
 
         try:
-            with self.temp_file.open("wb") as f_out:
-                while True:
-                    data = resp.read(8192)
-                    f_out.write(data)
-                    if len(data) != CHUNK_SIZE:
-                        break
+            with self.temp_file.open("xb") as f_out:
+                shutil.copyfileobj(src, f_out, CHUNK_SIZE)
 
             logger.debug("Downloaded file temporarily saved at %s", self.temp_file)
         except Exception:
-            self.temp_file.unlink()
+            self.temp_file.unlink(missing_ok=True)
             raise
 
-    def __enter__(self) -> Path:
+        return self.temp_file
+
+    def __enter__(self) -> Union[Path, io.BytesIO]:
         """Context manager __enter__ function.
 
-        :return: Resolved path to a local file to process or extract.
+        :return: Resolved path to a local file to process or extract, or the in-memory contents of a ZIP file.
         """
-        return self.temp_file
+        return self.downloaded
 
     def __exit__(
         self, exc_type: Optional[Type[BaseException]], exc_val: Optional[BaseException], exc_tb: Optional[TracebackType]
     ) -> Literal[False]:
         """Cleans up any temporary files resulting from the download."""
-        self.temp_file.unlink()
+        if self.temp_file is not None:
+            self.temp_file.unlink()
         return False
 
 
@@ -120,21 +218,27 @@ class ResolveSource:
         self.exit_stack = ExitStack()
 
         src_as_str = str(src)
-        if re.search(r"^[a-zA-Z0-9]+://", src_as_str):
-            if src_as_str.startswith("http://") or src_as_str.startswith("https://"):
-                logger.debug("Determined source was remote file, downloading")
-                self.path = self.exit_stack.enter_context(HandleDownload(src_as_str))
-            else:
-                raise ValueError("Only HTTP(S) supported as remote protocol")
+        if src_as_str.startswith(HTTP_SCHEMES):
+            logger.debug("Determined source was remote file, downloading")
+            downloaded = self.exit_stack.enter_context(HandleDownload(src_as_str, MAX_IN_MEMORY_DOWNLOAD))
+            if not isinstance(downloaded, Path):
+                # Small ZIP downloads are extracted straight from memory
+                self.path = self.exit_stack.enter_context(HandleZip(downloaded))
+                return
+
+            self.path = downloaded
+        elif "://" in src_as_str:
+            raise ValueError("Only HTTP(S) supported as remote protocol")
         else:
             self.path = Path(src)
 
         if self.path.is_file():
-            try:
-                self.path = self.exit_stack.enter_context(HandleZip(self.path))
-            except zipfile.BadZipFile:
-                # Make an assumption that our thing is a non-zip file
-                pass
+            if _is_zip(self.path):
+                try:
+                    self.path = self.exit_stack.enter_context(HandleZip(self.path))
+                except zipfile.BadZipFile:
+                    # Only the signature matched, make an assumption that our thing is a non-zip file
+                    pass
         elif not self.path.is_dir():
             raise ValueError("Path does not exist")
 
@@ -1,100 +1,132 @@
 import logging
+import os
 import shutil
 import warnings
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import repeat
 from pathlib import Path
+from typing import Final, Iterator, List, Sequence, Set, Tuple
 
-from .profile_parser import BlankLine, Comment, OVPNConfig, Parameter
+from .profile_parser import BlankLine, Comment, OVPNConfig, OVPNConfigParam, Parameter
 from .types import CipherStrength, ProviderExtensions, TLSVersion
 
 logger = logging.getLogger(__name__)
 
 
-def process_pia(config: OVPNConfig) -> None:
-    """Adds necessary options to force AES-GCM connections to Private Internet Access.
+# Below this many profiles, the cost of spinning up worker processes outweighs the parallel speedup
+MIN_PARALLEL_PROFILES: Final = 16
 
-    :param config: The already hardened OVPN profile
+
+def _mark_changes(settings: Sequence[Parameter]) -> Tuple[OVPNConfigParam, ...]:
+    """Surrounds `settings` with the lines that mark where Paranoid OpenVPN changed a profile.
+
+    :param settings: The settings being added to the profile.
+    :return: The block of lines to insert into the profile.
     """
-    cipher_strength = config.cipher_strength()
+    return (
+        BlankLine(),
+        Comment("# Begin Paranoid OpenVPN changes"),
+        *settings,
+        Comment("# End Paranoid OpenVPN changes"),
+        BlankLine(),
+    )
+
+
+@lru_cache(maxsize=None)
+def _pia_cipher_settings(strong: bool) -> Tuple[Parameter, ...]:
+    """Returns the data channel settings that force AES-GCM connections to Private Internet Access.
 
-    if cipher_strength == CipherStrength.STRONG:
-        cipher_settings = [
+    :param strong: Whether the profile's original cipher was strong.
+    :return: The data channel settings to add to the profile.
+    """
+    if strong:
+        return (
             Parameter("cipher", "AES-256-GCM"),
             Parameter("data-ciphers", "AES-256-GCM:CHACHA20-POLY1305:AES-256-CBC"),
             Parameter("ncp-disable"),
-        ]
+        )
     else:
-        cipher_settings = [
+        return (
             Parameter("cipher", "AES-128-GCM"),
             Parameter("data-ciphers", "AES-128-GCM:CHACHA20-POLY1305:AES-128-CBC"),
             Parameter("ncp-disable"),
-        ]
+        )
+
+
+@lru_cache(maxsize=None)
+def _pia_cipher_block(strong: bool) -> Tuple[OVPNConfigParam, ...]:
+    """Returns `_pia_cipher_settings()` wrapped by `_mark_changes()`, built once and shared between profiles."""
+    return _mark_changes(_pia_cipher_settings(strong))
 
-    lines_to_insert = [
-        BlankLine(),
-        Comment("# Begin Paranoid OpenVPN changes"),
-        *cipher_settings,
-        Comment("# End Paranoid OpenVPN changes"),
-        BlankLine(),
-    ]
+
+def process_pia(config: OVPNConfig) -> None:
+    """Adds necessary options to force AES-GCM connections to Private Internet Access.
+
+    :param config: The already hardened OVPN profile
+    """
+    strong = config.cipher_strength() == CipherStrength.STRONG
+    cipher_settings = _pia_cipher_settings(strong)
 
     # Insert the cipher settings where the old cipher setting was located, also need to clear out the previous settings
-    cipher_loc = config.index("cipher")
-    for param in cipher_settings:
-        try:
-            del config[param.name]
-        except KeyError:
-            pass
+    config.replace_block((param.name for param in cipher_settings), config.index("cipher"), _pia_cipher_block(strong))
 
-    for i, line in enumerate(lines_to_insert, start=cipher_loc):
-        config.insert(i, line)
 
+@lru_cache(maxsize=8)
+def _security_settings(cipher_strength: CipherStrength, min_tls: TLSVersion) -> Tuple[Parameter, ...]:
+    """Returns the control channel settings that match a data channel cipher strength.
 
-def process_profile(config: OVPNConfig, min_tls: TLSVersion, provider_ext: ProviderExtensions) -> None:
-    """Completely processes one OVPN profile.
+    The result only depends on the two enum inputs so it is computed once per combination and the parameters are
+    shared between every profile processed. This relies on profile elements being immutable; a profile can only
+    swap a shared element out, never change it for the others.
 
-    :param config: OVPN config to modify.
+    :param cipher_strength: Strength of the profile's data channel cipher.
     :param min_tls: Minimum TLS version to require.
-    :param provider_ext: Flag to indicate which, if any, provider specific tweaks to apply.
+    :return: The control channel settings to add to the profile.
     """
-    cipher_strength = config.cipher_strength()
-
-    if cipher_strength in [CipherStrength.STRONG, CipherStrength.MEDIUM]:
-        security_settings = [
-            Parameter("tls-version-min", "{} or-highest".format(min_tls.value)),
+    if cipher_strength >= CipherStrength.MEDIUM:
+        return (
+            Parameter("tls-version-min", f"{min_tls} or-highest"),
             Parameter(
                 "tls-cipher",
                 "TLS-ECDHE-ECDSA-WITH-AES-256-GCM-SHA384:TLS-ECDHE-ECDSA-WITH-CHACHA20-POLY1305-SHA256:TLS-ECDHE-ECDSA-WITH-AES-256-CBC-SHA384",  # noqa: E501
             ),
             Parameter("tls-groups", "secp521r1:X448:secp384r1:secp256r1:X25519"),
             Parameter("tls-ciphersuites", "TLS_AES_256_GCM_SHA384:TLS_CHACHA20_POLY1305_SHA256"),
-        ]
+        )
     else:
-        security_settings = [
-            Parameter("tls-version-min", "{} or-highest".format(min_tls.value)),
+        return (
+            Parameter("tls-version-min", f"{min_tls} or-highest"),
             Parameter(
                 "tls-cipher",
                 "TLS-ECDHE-ECDSA-WITH-AES-128-GCM-SHA256:TLS-ECDHE-ECDSA-WITH-CHACHA20-POLY1305-SHA256:TLS-ECDHE-ECDSA-WITH-AES-128-CBC-SHA256",  # noqa: E501
             ),
             Parameter("tls-groups", "secp256r1:X25519"),
             Parameter("tls-ciphersuites", "TLS_AES_128_GCM_SHA256:TLS_CHACHA20_POLY1305_SHA256"),
-        ]
+        )
 
-    lines_to_insert = [
-        BlankLine(),
-        Comment("# Begin Paranoid OpenVPN changes"),
-        *security_settings,
-        Comment("# End Paranoid OpenVPN changes"),
-        BlankLine(),
-    ]
 
-    for security_setting in security_settings:
-        try:
-            del config[security_setting.name]
-        except KeyError:
-            pass
+@lru_cache(maxsize=8)
+def _security_block(cipher_strength: CipherStrength, min_tls: TLSVersion) -> Tuple[OVPNConfigParam, ...]:
+    """Returns `_security_settings()` wrapped by `_mark_changes()`, built once and shared between profiles."""
+    return _mark_changes(_security_settings(cipher_strength, min_tls))
+
+
+def process_profile(config: OVPNConfig, min_tls: TLSVersion, provider_ext: ProviderExtensions) -> None:
+    """Completely processes one OVPN profile.
+
+    :param config: OVPN config to modify.
+    :param min_tls: Minimum TLS version to require.
+    :param provider_ext: Flag to indicate which, if any, provider specific tweaks to apply.
+    """
+    cipher_strength = config.cipher_strength()
+    security_settings = _security_settings(cipher_strength, min_tls)
 
-    for i, setting in enumerate(lines_to_insert, start=config.last_before_inline()):
-        config.insert(i, setting)
+    config.replace_block(
+        (security_setting.name for security_setting in security_settings),
+        config.last_before_inline(),
+        _security_block(cipher_strength, min_tls),
+    )
 
     if provider_ext == ProviderExtensions.PIA:
         process_pia(config)
@@ -103,9 +135,43 @@ def process_profile(config: OVPNConfig, min_tls: TLSVersion, provider_ext: Provi
         warnings.warn("Profile has WEAK cipher strength!")
 
 
+def _walk_files(root: str) -> Iterator["os.DirEntry[str]"]:
+    """Recursively yields every file underneath `root`.
+
+    Uses `os.scandir` so that the file type information returned by the directory listing is reused rather than
+    issuing a stat per entry.
+
+    :param root: Path to the directory to walk.
+    :return: Iterator of directory entries for each file found.
+    """
+    with os.scandir(root) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _walk_files(entry.path)
+            elif entry.is_file():
+                yield entry
+
+
+def _process_one(src: Path, dest: Path, min_tls: TLSVersion, provider_ext: ProviderExtensions) -> None:
+    """Reads, hardens, and writes one OVPN profile file.
+
+    This lives at module level so that it can be pickled and sent to worker processes.
+
+    :param src: Path to the input OVPN profile.
+    :param dest: Path to the output OVPN profile.
+    :param min_tls: Minimum TLS version to require.
+    :param provider_ext: Flag to indicate which, if any, provider specific tweaks to apply.
+    """
+    config = OVPNConfig.read(src)
+    process_profile(config, min_tls, provider_ext)
+    config.write(dest)
+
+
 def process_profiles(src: Path, dest: Path, min_tls: TLSVersion, provider_ext: ProviderExtensions) -> None:
     """Completely processes one or more OVPN profiles.
 
+    When `src` is a directory containing many profiles, they are processed in parallel across worker processes.
+
     :param src: Path to local input file or directory containing OVPN profile(s).
     :param dest: Path to the output file (if `src` was a file) or directory (if `src`) was a directory.
     :param min_tls: Minimum TLS version to require.
@@ -113,23 +179,52 @@ def process_profiles(src: Path, dest: Path, min_tls: TLSVersion, provider_ext: P
     """
     if src.is_file():
         dest.parent.mkdir(parents=True, exist_ok=True)
-        config = OVPNConfig.read(src)
-        process_profile(config, min_tls, provider_ext)
-        config.write(dest)
+        _process_one(src, dest, min_tls, provider_ext)
     elif src.is_dir():
-        # If dest is relative to src, rglob will cause this script to infinitely reprocess its own output
-        if dest.is_relative_to(src):
+        # If dest is relative to src, the walk will cause this script to infinitely reprocess its own output. This is
+        # `Path.is_relative_to()`, which only exists on Python 3.9+, applied to the resolved paths.
+        resolved_src = src.resolve()
+        resolved_dest = dest.resolve()
+        if resolved_dest == resolved_src or resolved_src in resolved_dest.parents:
             raise ValueError("dest path cannot be relative to src path")
 
-        for child in src.rglob("*.*"):
-            dest_file = dest / child.relative_to(src)
-            dest_file.parent.mkdir(parents=True, exist_ok=True)
-
-            if child.suffix == ".ovpn":
-                config = OVPNConfig.read(child)
-                process_profile(config, min_tls, provider_ext)
-                config.write(dest_file)
+        src_str = str(src)
+        dest_str = str(dest)
+        profiles: List[Tuple[Path, Path]] = []
+        created_dirs: Set[str] = set()
+        for entry in _walk_files(src_str):
+            # Only files with an extension are carried over to the output
+            if "." not in entry.name:
+                continue
+
+            dest_file = os.path.join(dest_str, os.path.relpath(entry.path, src_str))
+            dest_parent = os.path.dirname(dest_file)
+            if dest_parent not in created_dirs:
+                os.makedirs(dest_parent, exist_ok=True)
+                created_dirs.add(dest_parent)
+
+            if entry.name.endswith(".ovpn"):
+                profiles.append((Path(entry.path), Path(dest_file)))
             else:
-                shutil.copy(child, dest_file)
+                # Keeps the permission bits so that private keys stay private
+                shutil.copy(entry.path, dest_file)
+
+        if len(profiles) < MIN_PARALLEL_PROFILES:
+            for profile_src, profile_dest in profiles:
+                _process_one(profile_src, profile_dest, min_tls, provider_ext)
+        else:
+            profile_srcs, profile_dests = zip(*profiles)
+            chunksize = max(1, len(profiles) // (4 * (os.cpu_count() or 1)))
+            with ProcessPoolExecutor() as executor:
+                # Exhaust the results so that any exception raised in a worker is re-raised here
+                for _ in executor.map(
+                    _process_one,
+                    profile_srcs,
+                    profile_dests,
+                    repeat(min_tls),
+                    repeat(provider_ext),
+                    chunksize=chunksize,
+                ):
+                    pass
     else:
         raise ValueError(f"Source does not exist: {src}")
@@ -1,23 +1,108 @@
 import re
+import sys
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Iterable, Optional, Sequence, TextIO, Union
+from typing import Dict, Final, Iterable, List, Optional, Sequence, Set, TextIO, Tuple, Type, Union
 
 from .types import CipherStrength
 
+COMMENT_CHARS: Final = ("#", ";")
+INLINE_TAG_RE: Final = re.compile(r"<([a-z0-9][a-z\-\_0-9]*[a-z0-9])>")
+# The inline tags OpenVPN documents; these are recognized without going through `INLINE_TAG_RE`
+INLINE_TAGS: Final = frozenset(
+    {
+        "<ca>",
+        "<cert>",
+        "<crl-verify>",
+        "<dh>",
+        "<extra-certs>",
+        "<http-proxy-user-pass>",
+        "<key>",
+        "<pkcs12>",
+        "<secret>",
+        "<tls-auth>",
+        "<tls-crypt>",
+        "<tls-crypt-v2>",
+    }
+)
+# Parameter names must start and end with one of the edge characters and otherwise only use the name characters
+PARAMETER_EDGE_CHARS: Final = "abcdefghijklmnopqrstuvwxyz0123456789"
+PARAMETER_NAME_CHARS: Final = PARAMETER_EDGE_CHARS + "-_"
+
+
+def _inline_tag(line: str) -> Optional[str]:
+    """Returns the inline tag that `line` opens, including the <>s.
+
+    :param line: A config line with surrounding whitespace already removed
+    :return: The opening tag, or None if `line` doesn't start with one
+    """
+    if line in INLINE_TAGS:
+        return line
+
+    tag_match = INLINE_TAG_RE.match(line)
+    return tag_match.group(0) if tag_match else None
+
 
 class OVPNConfigParam(ABC):
     """ABC that represents a single setting in an OpenVPN config. Used mostly for `typing` purposes."""
 
+    # Profiles are made of many small elements, so none of the classes in this hierarchy carry a `__dict__`
+    __slots__ = ()
+
+    # The setting's name and value, if applicable. These are slots rather than properties because they are read
+    # constantly. Elements are immutable: `OVPNConfig` indexes them by name and the same element can be shared between
+    # configs, so attributes are only ever set through `_init_slot()` during construction.
+    name: Optional[str]
+    value: Optional[str]
+
+    def _init_slot(self, attr: str, value: object) -> None:
+        """Sets one of the element's attributes; only for use by constructors and unpickling.
+
+        :param attr: Name of the slot to set
+        :param value: Value to store in the slot
+        """
+        object.__setattr__(self, attr, value)
+
+    def __setattr__(self, attr: str, value: object) -> None:
+        """Rejects attribute assignment as elements are immutable once constructed.
+
+        :raises AttributeError: Always raised
+        """
+        raise AttributeError(f"{type(self).__name__} is immutable, cannot set {attr}")
+
+    def __delattr__(self, attr: str) -> None:
+        """Rejects attribute deletion as elements are immutable once constructed.
+
+        :raises AttributeError: Always raised
+        """
+        raise AttributeError(f"{type(self).__name__} is immutable, cannot delete {attr}")
+
+    def __setstate__(self, state: Tuple[None, Dict[str, object]]) -> None:
+        """Restores the slots of an unpickled or copied element without going through `__setattr__`.
+
+        :param state: The `(None, slots)` pair produced by the default `__reduce_ex__` for classes with `__slots__`
+        """
+        for attr, value in state[1].items():
+            self._init_slot(attr, value)
+
     @abstractmethod
-    def write(self, f_out: TextIO) -> int:  # pragma: no cover
-        """Abstract method to require children to support writing their contents to a file."""
+    def to_str(self) -> str:  # pragma: no cover
+        """Abstract method to require children to support serializing their contents, including trailing newline."""
         pass
 
+    def write(self, f_out: TextIO) -> int:
+        """Writes the contents of the element to the output OVPN profile.
+
+        :param f_out: Handle to file open for writing.
+        :return: The number of lines written.
+        """
+        f_out.write(self.to_str())
+        return len(self)
+
     @classmethod
     @abstractmethod
-    def read(cls, config: Sequence[str]) -> "OVPNConfigParam":  # pragma: no cover
-        """Abstract method to require children to implement a factory that reads from config lines."""
+    def read(cls, config: Sequence[str], start: int = 0) -> "OVPNConfigParam":  # pragma: no cover
+        """Abstract method to require children to implement a factory that reads from config lines at `start`."""
         pass
 
     @abstractmethod
@@ -32,39 +117,30 @@ class OVPNConfigParam(ABC):
 
         return self.name == other.name and self.value == other.value
 
-    @property
-    @abstractmethod
-    def name(self) -> Union[str, None]:  # pragma: no cover
-        """Abstract method to require children to expose the setting's name, if applicable."""
-        pass
-
-    @property
-    @abstractmethod
-    def value(self) -> Union[str, None]:  # pragma: no cover
-        """Abstract method to require children to expose the setting's value, if applicable."""
-        pass
-
 
 class BlankLine(OVPNConfigParam):
     """Class that represents a literal blank line. Need this for method compatibility."""
 
-    def write(self, f_out: TextIO) -> int:
-        """Writes a blank line to the output OVPN profile.
+    __slots__ = ()
 
-        :param f_out: Handle to file open for writing.
-        :return: The number of lines written.
-        """
-        f_out.write("\n")
-        return 1
+    # Blank lines don't have a name or a value
+    name = None
+    value = None
+
+    def to_str(self) -> str:
+        """Returns a blank line as it appears in an OVPN profile."""
+        return "\n"
 
     @classmethod
-    def read(cls, config: Sequence[str]) -> "BlankLine":
-        """Factory function that returns an instance of this class if the head of `config` is applicable.
+    def read(cls, config: Sequence[str], start: int = 0) -> "BlankLine":
+        """Factory function that returns an instance of this class if the line at `start` is applicable.
 
-        :raises ValueError: Raised if the first config line isn't blank.
-        :return: Instance of this class initialized with the head of `config`
+        :param config: Lines of an OVPN profile
+        :param start: Index in `config` of the line to read from
+        :raises ValueError: Raised if the config line isn't blank.
+        :return: Instance of this class initialized with the line at `start`
         """
-        if config[0].strip() != "":
+        if config[start].strip() != "":
             raise ValueError("Line is not empty")
 
         return BlankLine()
@@ -73,108 +149,96 @@ class BlankLine(OVPNConfigParam):
         """Returns the number of lines this element takes up."""
         return 1
 
-    @property
-    def name(self) -> None:
-        """Returns None as blank lines don't have a name."""
-        return None
-
-    @property
-    def value(self) -> None:
-        """Returns None as blank lines don't have a value."""
-        return None
-
 
 class Comment(OVPNConfigParam):
     """Class represending a OVPN profile comment."""
 
+    __slots__ = ("name",)
+
+    name: str
+
+    # Comments don't have a value
+    value = None
+
     def __init__(self, comment: str) -> None:
         """Constructor.
 
         :param comment: The content of the comment, prefixed with the comment character.
         """
-        self.comment = comment.strip()
+        self._init_slot("name", comment.strip())
 
-    def write(self, f_out: TextIO) -> int:
-        """Writes the contents of the comment to the output OVPN profile.
-
-        :param f_out: Handle to file open for writing.
-        :return: The number of lines written.
-        """
-        f_out.write(f"{self.comment}\n")
-        return len(self)
+    def to_str(self) -> str:
+        """Returns the comment as it appears in an OVPN profile."""
+        return f"{self.name}\n"
 
     @classmethod
-    def read(cls, config: Sequence[str]) -> "Comment":
-        """Factory function that returns an instance of this class if the head of `config` is applicable.
+    def read(cls, config: Sequence[str], start: int = 0) -> "Comment":
+        """Factory function that returns an instance of this class if the line at `start` is applicable.
 
-        :raises valueerror: raised if the first config line doesn't start with a comment character
-        :return: Instance of this class initialized with the head of `config`
+        :param config: Lines of an OVPN profile
+        :param start: Index in `config` of the line to read from
+        :raises valueerror: raised if the config line doesn't start with a comment character
+        :return: Instance of this class initialized with the line at `start`
         """
-        if not (config[0].startswith("#") or config[0].startswith(";")):
+        if not config[start].startswith(COMMENT_CHARS):
             raise ValueError("Line does not start with a comment character")
 
-        return Comment(config[0])
+        return Comment(config[start])
 
     def __len__(self) -> int:
         """Returns the number of lines this element takes up."""
         return 1
 
     @property
-    def name(self) -> str:
+    def comment(self) -> str:
         """Returns the content of the comment."""
-        return self.comment
-
-    @property
-    def value(self) -> None:
-        """Returns None as comments don't have a value."""
-        return None
+        return self.name
 
 
 class Inline(OVPNConfigParam):
     """Class represending a OVPN profile inline value (e.g. ca, cert)."""
 
+    __slots__ = ("name", "_value")
+
+    name: str
+    _value: Tuple[str, ...]
+
     def __init__(self, param: str, value: Sequence[str]) -> None:
         """Constructor.
 
         :param param: The name of the inline parameter, including <>s
         :param value: Sequence of strings that make up the inline value
         """
-        self._name = param.strip()
-        self._value = [item.strip() for item in value]
+        # Names repeat across profiles and are compared constantly, so share a single copy of each
+        self._init_slot("name", sys.intern(param.strip()))
+        self._init_slot("_value", tuple(item.strip() for item in value))
 
-    def write(self, f_out: TextIO) -> int:
-        """Writes the contents of the inline element to the output OVPN profile.
-
-        :param f_out: Handle to file open for writing
-        :return: The number of lines written
-        """
-        naked_name = self._name[1:-1]
-        f_out.write(f"<{naked_name}>\n")
-        for line in self._value:
-            f_out.write(f"{line}\n")
-        f_out.write(f"</{naked_name}>\n")
-
-        return len(self)
+    def to_str(self) -> str:
+        """Returns the inline element, including its opening and closing tags, as it appears in an OVPN profile."""
+        naked_name = self.name[1:-1]
+        return "".join([f"<{naked_name}>\n", *(f"{line}\n" for line in self._value), f"</{naked_name}>\n"])
 
     @classmethod
-    def read(cls, config: Sequence[str]) -> "Inline":
-        """Factory function that returns an instance of this class if the head of `config` is applicable.
+    def read(cls, config: Sequence[str], start: int = 0) -> "Inline":
+        """Factory function that returns an instance of this class if the line at `start` is applicable.
 
-        :raises ValueError: Raised if the first config line isn't an inline tag
+        :param config: Lines of an OVPN profile
+        :param start: Index in `config` of the line to read from
+        :raises ValueError: Raised if the config line isn't an inline tag
         :return: Instance of this class initialized with the entire contents of the inline tag
         """
-        line = config[0].strip()
+        line = config[start].strip()
 
-        tag_match = re.match(r"<([a-z0-9][a-z\-\_0-9]*[a-z0-9])>", line)
-        if not tag_match:
+        param = _inline_tag(line)
+        if not param:
             raise ValueError(f"Line is not an inline tag: {line}")
 
-        param = tag_match.group(0)
-        stripped_param = tag_match.group(1)
+        close_tag = f"</{param[1:]}"
         value = []
 
-        for line in config[1:]:
-            if line.startswith(f"</{stripped_param}>"):
+        for i in range(start + 1, len(config)):
+            line = config[i]
+            if line.startswith(close_tag):
                 break
             value.append(line)
         else:
@@ -187,49 +251,51 @@ class Inline(OVPNConfigParam):
         return 2 + len(self._value)
 
     @property
-    def name(self) -> str:
-        """Returns the name of the inline tag, including the <>s."""
-        return self._name
+    def value(self) -> str:  # type: ignore[override]
+        """Returns the the contents of the inline tag as one string.
 
-    @property
-    def value(self) -> str:
-        """Returns the the contents of the inline tag as one string."""
+        Unlike the other elements' values this is assembled on demand, as only equality checks need it.
+        """
         return "\n".join(self._value)
 
 
 class Parameter(OVPNConfigParam):
     """Class represending a standard OVPN profile parameter."""
 
+    __slots__ = ("name", "value")
+
+    name: str
+
     def __init__(self, param: str, value: Optional[str] = None) -> None:
         """Constructor.
 
         :param param: Name of the parameter
         :param value: Value of the parameter, can be None for some parameters
         """
-        self._name = param.strip()
-        self._value = value.strip() if value else None
-
-    def write(self, f_out: TextIO) -> int:
-        """Writes the contents of the parammeter to the output OVPN profile.
+        self._init_slot("name", sys.intern(param.strip()))
+        self._init_slot("value", value.strip() if value else None)
 
-        :param f_out: Handle to file open for writing.
-        :return: The number of lines written.
-        """
-        if self._value:
-            f_out.write(f"{self._name} {self._value}\n")
+    def to_str(self) -> str:
+        """Returns the parameter as it appears in an OVPN profile."""
+        if self.value:
+            return f"{self.name} {self.value}\n"
         else:
-            f_out.write(f"{self._name}\n")
-        return 1
+            return f"{self.name}\n"
 
     @classmethod
-    def read(cls, config: Sequence[str]) -> "Parameter":
-        """Factory function that returns an instance of this class if the head of `config` is applicable.
+    def read(cls, config: Sequence[str], start: int = 0) -> "Parameter":
+        """Factory function that returns an instance of this class if the line at `start` is applicable.
 
+        :param config: Lines of an OVPN profile
+        :param start: Index in `config` of the line to read from
+        :raises ValueError: Raised if the config line isn't a parameter
         :return: Instance of this class initialized with the contents of the parameter
         """
-        line = config[0].strip()
+        line = config[start].strip()
 
-        if not re.match(r"[a-z0-9][a-z\-\_0-9]*[a-z0-9]", line):
+        # Equivalent to matching r"[a-z0-9][a-z\-\_0-9]*[a-z0-9]" at the start of the line, but with str methods
+        name_len = len(line) - len(line.lstrip(PARAMETER_NAME_CHARS))
+        if name_len < 2 or line[0] not in PARAMETER_EDGE_CHARS or len(line[:name_len].rstrip("-_")) < 2:
             raise ValueError(f"Line is not a parameter: {line}")
 
         try:
@@ -242,23 +308,21 @@ class Parameter(OVPNConfigParam):
         """Returns the number of lines this element takes up."""
         return 1
 
-    @property
-    def name(self) -> str:
-        """Returns the name of the parameter."""
-        return self._name
-
-    @property
-    def value(self) -> Optional[str]:
-        """Returns the name of the parameter, can be None if the parameter has no value."""
-        return self._value
-
 
 class OVPNConfig:
     """Class that represents an entire OVPN profile."""
 
     def __init__(self, params: Optional[Iterable[OVPNConfigParam]] = None) -> None:
-        """Constructor."""
+        """Constructor.
+
+        `params` should only be modified through this class's methods so that the name index stays in sync.
+        """
         self.params = list(params) if params else []
+        # Maps the name of every element, comments included, to an occurrence of it in `params`
+        self._index: Dict[str, OVPNConfigParam] = {}
+        # Result of `cipher_strength()`, cleared whenever the "cipher" parameter changes
+        self._cipher_strength: Optional[CipherStrength] = None
+        self._reindex()
 
     @classmethod
     def read(cls, config_file: Path) -> "OVPNConfig":
@@ -269,21 +333,47 @@ class OVPNConfig:
         """
         config = OVPNConfig()
 
+        # Lines are consumed as the file iterator yields them; only the body of an open inline tag is buffered
+        inline_line: Optional[str] = None
+        inline_close = ""
+        inline_value: List[str] = []
         with config_file.open("rt") as f_in:
-            lines = f_in.readlines()
+            for line in f_in:
+                if inline_line is not None:
+                    if line.startswith(inline_close):
+                        config.add(Inline(inline_line, inline_value))
+                        inline_line = None
+                    else:
+                        inline_value.append(line)
+                    continue
+
+                # The first character determines the only element type that can possibly match
+                stripped = line.lstrip()
+                parser: Type[OVPNConfigParam]
+                if not stripped:
+                    parser = BlankLine
+                elif stripped.startswith(COMMENT_CHARS):
+                    parser = Comment
+                elif stripped.startswith("<"):
+                    inline_line = _inline_tag(stripped.rstrip())
+                    if not inline_line:
+                        raise ValueError(f"Unknown config file line {line.rstrip()} in {config_file}")
+                    inline_close = f"</{inline_line[1:]}"
+                    inline_value = []
+                    continue
+                else:
+                    parser = Parameter
 
-        while lines:
-            for parser in [BlankLine, Comment, Inline, Parameter]:
                 try:
-                    # mypy does not deal with abstract class methods well, see mypy issue #6244
-                    ele = parser.read(lines)  # type: ignore[attr-defined]
-                    config.add(ele)
-                    lines = lines[len(ele) :]
-                    break
-                except ValueError:
-                    pass
-            else:
-                raise ValueError(f"Unknown config file line {lines[0]} in {config_file}")
+                    ele = parser.read((line,))
+                except ValueError as exc:
+                    raise ValueError(f"Unknown config file line {line.rstrip()} in {config_file}") from exc
+
+                config.add(ele)
+
+        if inline_line is not None:
+            # The file ended before the inline tag was closed
+            raise ValueError(f"Unknown config file line {inline_line} in {config_file}")
 
         return config
 
@@ -297,31 +387,38 @@ class OVPNConfig:
         :param exist_ok: Whether it is OK if the parameter already exists in the config.
         :raises KeyError: Raised if `new_param` already exists and `exist_ok` is False
         """
-        if not (isinstance(new_param, BlankLine) or isinstance(new_param, Comment)):
-            for i, existing in enumerate(self.params):
-                if existing.name == new_param.name:
-                    if exist_ok:
-                        self.params[i] = new_param
-                        break
-                    else:
-                        raise KeyError(f"{new_param.name} already present in config")
-            else:
-                self.params.append(new_param)
-        else:
+        if isinstance(new_param, BlankLine) or isinstance(new_param, Comment) or new_param.name is None:
+            self.params.append(new_param)
+            self._index_param(new_param)
+            return
+
+        # The name index answers whether the parameter exists; only a replacement has to locate it in `params`
+        existing = self._index.get(new_param.name)
+        if existing is None:
             self.params.append(new_param)
+            self._index_param(new_param)
+        elif exist_ok:
+            for i, param in enumerate(self.params):
+                if param is existing:
+                    self.params[i] = new_param
+                    break
+            self._index_param(new_param, replace=True)
+        else:
+            raise KeyError(f"{new_param.name} already present in config")
 
     def write(self, out_file: Path) -> int:
         """Writes the contents of the entire config to the output OVPN profile.
 
-        :param f_out: Handle to file open for writing.
+        Each element is serialized on its own and handed to `writelines()`, which batches them through the file's
+        buffer without first concatenating the whole profile into one string.
+
+        :param out_file: Path to the output OVPN profile.
         :return: The number of lines written.
         """
-        total_lines = 0
         with out_file.open("wt") as f_out:
-            for param in self.params:
-                total_lines += param.write(f_out)
+            f_out.writelines(param.to_str() for param in self.params)
 
-        return total_lines
+        return sum(len(param) for param in self.params)
 
     def __contains__(self, key: str) -> bool:
         """Magic function that implements "in"; returns whether that parameter is present in the config.
@@ -333,11 +430,7 @@ class OVPNConfig:
         if not isinstance(key, str):
             raise TypeError("key must be a str")
 
-        for param in self.params:
-            if key == param.name:
-                return True
-        else:
-            return False
+        return key in self._index
 
     def __getitem__(self, key: Union[str, int]) -> OVPNConfigParam:
         """Magic function that implements object dereference.
@@ -355,11 +448,10 @@ class OVPNConfig:
         elif not key:
             raise TypeError("Empty key not allowed")
 
-        for param in self.params:
-            if key == param.name:
-                return param
-        else:
-            raise KeyError(f"{key} does not exist")
+        try:
+            return self._index[key]
+        except KeyError:
+            raise KeyError(f"{key} does not exist") from None
 
     def __delitem__(self, key: Union[str, int]) -> None:
         """Magic function that implements object deletion.
@@ -372,14 +464,18 @@ class OVPNConfig:
         :raises KeyError: Raised if `key` is a `str` and that element does not exist
         """
         if isinstance(key, int):
-            del self.params[key]
+            self._unindex_param(self.params.pop(key))
             return
         elif not key:
             raise TypeError("Empty key not allowed")
 
+        if key not in self._index:
+            raise KeyError(f"{key} does not exist")
+
         for i, param in enumerate(self.params):
             if key == param.name:
                 del self.params[i]
+                self._unindex_param(param)
                 break
         else:
             raise KeyError(f"{key} does not exist")
@@ -397,15 +493,31 @@ class OVPNConfig:
         if not key:
             raise TypeError("Empty key not allowed")
 
+        if key not in self._index:
+            raise KeyError(f"{key} does not exist")
+
         start = start or 0
         end = end or len(self.params)
 
-        for i, param in enumerate(self.params[start:end]):
-            if key == param.name:
-                return i
+        # Walk the range in place rather than copying it out with a slice; the result stays relative to `start`
+        params = self.params
+        for i in range(start, min(end, len(params))):
+            if key == params[i].name:
+                return i - start
         else:
             raise KeyError(f"{key} does not exist")
 
+    def delete_many(self, names: Iterable[str]) -> None:
+        """Deletes every element whose name is in `names` in a single pass over the config.
+
+        Unlike `del`, names that are not present in the config are ignored.
+
+        :param names: The names of the parameters to delete
+        """
+        targets = set(names)
+        self.params = [param for param in self.params if param.name not in targets]
+        self._reindex()
+
     def insert(self, index: int, param: OVPNConfigParam) -> None:
         """Implements behavior similar to `list.insert`.
 
@@ -413,10 +525,97 @@ class OVPNConfig:
         :param param: The new OVPN element to add
         :raises KeyError: Raise if `param` already exists
         """
-        if param.name and not isinstance(param, Comment) and param.name in self:
+        if param.name and not isinstance(param, Comment) and param.name in self._index:
             raise KeyError(f"{param.name} already exists")
 
         self.params.insert(index, param)
+        self._index_param(param)
+
+    def insert_many(self, index: int, params: Sequence[OVPNConfigParam]) -> None:
+        """Implements behavior similar to calling `list.insert` for each of `params` at consecutive indexes.
+
+        The elements are spliced in with a single list operation so the existing elements only shift once.
+
+        :param index: The desired index to insert the first element at
+        :param params: The new OVPN elements to add
+        :raises KeyError: Raise if a non-comment element of `params` already exists
+        """
+        names: Set[str] = set()
+        for param in params:
+            if param.name and not isinstance(param, Comment):
+                if param.name in self._index or param.name in names:
+                    raise KeyError(f"{param.name} already exists")
+                names.add(param.name)
+
+        self.params[index:index] = params
+        for param in params:
+            self._index_param(param)
+
+    def replace_block(self, names: Iterable[str], index: int, new_params: Sequence[OVPNConfigParam]) -> None:
+        """Removes all parameters named in `names` and inserts `new_params` at `index` as one contiguous block.
+
+        `index` refers to a position in the config *before* the removal and is shifted down by the number of removed
+        parameters that preceded it. Names that are not present in the config are ignored.
+
+        :param names: The names of the parameters to remove
+        :param index: The desired index, prior to removal, to insert `new_params` at
+        :param new_params: The new OVPN elements to add
+        :raises KeyError: Raise if a non-comment element of `new_params` still exists after the removal
+        """
+        targets = set(names)
+        index -= sum(1 for param in self.params[:index] if param.name in targets)
+
+        old_params = self.params
+        old_index = self._index
+        self.delete_many(targets)
+        try:
+            self.insert_many(index, new_params)
+        except KeyError:
+            self.params = old_params
+            self._index = old_index
+            raise
+
+    def _index_param(self, param: OVPNConfigParam, replace: bool = False) -> None:
+        """Records a newly added element in the name index.
+
+        :param param: The element that was added to `params`
+        :param replace: Whether `param` took the place of the existing element with the same name
+        """
+        if param.name is None:
+            return
+
+        if param.name == "cipher":
+            self._cipher_strength = None
+
+        if replace:
+            self._index[param.name] = param
+        else:
+            self._index.setdefault(param.name, param)
+
+    def _unindex_param(self, param: OVPNConfigParam) -> None:
+        """Drops a removed element from the name index.
+
+        :param param: The element that was removed from `params`
+        """
+        if param.name is None or self._index.get(param.name) is not param:
+            return
+
+        if param.name == "cipher":
+            self._cipher_strength = None
+
+        del self._index[param.name]
+        # Comments, and elements given to the constructor, can repeat so another may need to take this one's place
+        for other in self.params:
+            if other.name == param.name:
+                self._index[param.name] = other
+                break
+
+    def _reindex(self) -> None:
+        """Rebuilds the name index from scratch after `params` was replaced wholesale."""
+        self._index = {}
+        self._cipher_strength = None
+        for param in self.params:
+            self._index_param(param)
 
     def last_before_inline(self) -> int:
         """Returns the last viable line before inline elements start.
@@ -427,10 +626,11 @@ class OVPNConfig:
 
         :return: The last line before inline elements start
         """
-        try:
-            return min([i for i, param in enumerate(self.params) if isinstance(param, Inline)])
-        except ValueError:
-            return len(self.params)
+        for i, param in enumerate(self.params):
+            if isinstance(param, Inline):
+                return i
+
+        return len(self.params)
 
     def cipher_strength(self) -> CipherStrength:
         """Uses a dumb heuristic to determine the strength of the "cipher" in the file.
@@ -438,15 +638,22 @@ class OVPNConfig:
         This is not very enlightened: 256-bit -> strong, 192-bit -> medium, 128-bit -> acceptable, and everything
         else is weak. This would break if algorithms are added that don't follow these common key sizes.
 
+        The result is cached until the "cipher" parameter is added, replaced, or removed.
+
         :return: Enum value that describes the cipher stregnth
         """
+        if self._cipher_strength is not None:
+            return self._cipher_strength
+
         cipher = self["cipher"].value.upper() if self["cipher"].value else None
 
         if cipher and ("256" in cipher or "CHACHA20-POLY1305" in cipher):
-            return CipherStrength.STRONG
+            self._cipher_strength = CipherStrength.STRONG
         elif cipher and "192" in cipher:
-            return CipherStrength.MEDIUM
+            self._cipher_strength = CipherStrength.MEDIUM
         elif cipher and ("128" in cipher or "SEED-" in cipher or "SM4-" in cipher):
-            return CipherStrength.ACCEPTABLE
+            self._cipher_strength = CipherStrength.ACCEPTABLE
         else:
-            return CipherStrength.WEAK
+            self._cipher_strength = CipherStrength.WEAK
+
+        return self._cipher_strength
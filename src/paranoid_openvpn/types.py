@@ -1,19 +1,45 @@
-from enum import Enum, auto, unique
+from enum import Enum, IntEnum, auto, unique
+from typing import Final
 
 
 @unique
-class TLSVersion(Enum):
-    """Enum for desired minimum TLS version to require."""
+class TLSVersion(str, Enum):
+    """Enum for desired minimum TLS version to require.
+
+    Members are the version strings themselves, so they can be formatted or compared against strings directly.
+    """
 
     v1_0 = "1.0"
     v1_1 = "1.1"
     v1_2 = "1.2"
     v1_3 = "1.3"
 
+    # Format and print as the bare version number, like `enum.StrEnum` does on Python 3.11+
+    __str__ = str.__str__
+    __format__ = str.__format__  # type: ignore[assignment]
+
+    @classmethod
+    def from_value(cls, value: str) -> "TLSVersion":
+        """Returns the member for a version string such as "1.2".
+
+        Equivalent to `TLSVersion(value)` but is a single dict lookup rather than a trip through `EnumMeta.__call__`.
+
+        :param value: The TLS version number
+        :raises ValueError: Raised if `value` is not a known TLS version
+        :return: The matching enum member
+        """
+        try:
+            return _TLS_VERSIONS[value]
+        except KeyError:
+            raise ValueError(f"{value!r} is not a valid {cls.__name__}") from None
+
+
+_TLS_VERSIONS: Final = {member.value: member for member in TLSVersion}
+
 
 @unique
-class CipherStrength(Enum):
-    """Enum to denote the relative cipher strength level of a OVPN profile."""
+class CipherStrength(IntEnum):
+    """Enum to denote the relative cipher strength level of a OVPN profile. Members are ordered weakest first."""
 
     WEAK = auto()
     ACCEPTABLE = auto()
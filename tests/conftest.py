@@ -0,0 +1,46 @@
+import urllib.request
+from pathlib import Path
+from typing import Any, Iterator, NoReturn
+from unittest.mock import MagicMock
+from zipfile import ZipFile
+
+import pytest
+from pytest_mock import MockerFixture
+
+
+@pytest.fixture(scope="session")
+def sample_zip(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """Builds a ZIP file containing a single "test.txt" member once for the whole test session.
+
+    Tests must treat the file as read-only as it is shared between them.
+    """
+    zip_loc = tmp_path_factory.mktemp("sample_zip") / "test.zip"
+
+    with ZipFile(zip_loc, mode="w") as temp_zip:
+        temp_zip.writestr("test.txt", "This is a test")
+
+    return zip_loc
+
+
+def _network_disabled(*args: Any, **kwargs: Any) -> NoReturn:
+    """Stands in for `urllib.request.urlopen` so that no test can reach the network by accident."""
+    raise RuntimeError("Network access is disabled during tests, use the mocked_urlopen fixture")
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _no_network() -> Iterator[None]:
+    """Blocks real HTTP requests for the whole test session."""
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(urllib.request, "urlopen", _network_disabled)
+        yield
+
+
+@pytest.fixture
+def mocked_urlopen(mocker: MockerFixture) -> MagicMock:
+    """Replaces `urllib.request.urlopen` for one test with a mock whose response defaults to HTTP 200.
+
+    Tests set the response body through `mocked_urlopen.return_value.read`.
+    """
+    mocked = mocker.patch("urllib.request.urlopen")
+    mocked.return_value.code = 200
+    return mocked
@@ -1,42 +1,60 @@
+import io
 from pathlib import Path
+from typing import Callable, Union
+from unittest.mock import MagicMock
 from zipfile import BadZipFile, ZipFile
 
-import py
 import pytest
 from pytest_mock import MockerFixture
 
 from paranoid_openvpn.input_handlers import HandleDownload, HandleZip, ResolveSource
 
+SourceType = Union[str, Path]
 
-def test_resolvesource_local_dir(mocker: MockerFixture, tmpdir: py.path.local) -> None:
-    """Test ResolveSource context manager when input is a local directory."""
+
+@pytest.mark.parametrize("as_type", [Path, str])
+def test_resolvesource_local_dir(mocker: MockerFixture, tmp_path: Path, as_type: Callable[[Path], SourceType]) -> None:
+    """Test ResolveSource context manager when input is a local directory, given as a Path or a str."""
     mocked_handledownload = mocker.patch("paranoid_openvpn.input_handlers.HandleDownload")
     mocked_handlezip = mocker.patch("paranoid_openvpn.input_handlers.HandleZip")
-    tmpdir = Path(tmpdir)
 
-    with ResolveSource(tmpdir) as resolved_src:
-        assert resolved_src == Path(tmpdir)
+    with ResolveSource(as_type(tmp_path)) as resolved_src:
+        assert resolved_src == tmp_path
         assert not mocked_handledownload.called
         assert not mocked_handlezip.called
 
-    assert tmpdir.exists()
+    assert tmp_path.exists()
 
 
-def test_resolvesource_local_dir_as_str(mocker: MockerFixture, tmpdir: py.path.local) -> None:
-    """Test ResolveSource context manager when input is a local directory as a str."""
-    tmpdir = Path(tmpdir)
+def test_resolvesource_local_nonzip_file(mocker: MockerFixture, tmp_path: Path) -> None:
+    """Test ResolveSource context manager when input is a local non-zip file."""
+    dummy_file = tmp_path / "test.ovpn"
 
-    with ResolveSource(str(tmpdir)) as resolved_src:
-        assert resolved_src == Path(tmpdir)
+    dummy_file.touch()
 
-    assert tmpdir.exists()
+    with ResolveSource(dummy_file) as resolved_src:
+        assert resolved_src == dummy_file
 
+    assert dummy_file.exists()
 
-def test_resolvesource_local_nonzip_file(mocker: MockerFixture, tmpdir: py.path.local) -> None:
-    """Test ResolveSource context manager when input is a local non-zip file."""
-    dummy_file = Path(tmpdir / "test.ovpn")
 
-    dummy_file.touch()
+def test_resolvesource_local_zip_signature(mocker: MockerFixture, tmp_path: Path) -> None:
+    """Test ResolveSource context manager only extracts files with a ZIP signature."""
+    mocked_handlezip = mocker.patch("paranoid_openvpn.input_handlers.HandleZip")
+    dummy_file = tmp_path / "test.zip"
+
+    dummy_file.write_bytes(b"PK not really a zip")
+
+    with ResolveSource(dummy_file) as resolved_src:
+        assert resolved_src == dummy_file
+        assert not mocked_handlezip.called
+
+
+def test_resolvesource_local_bad_zip(tmp_path: Path) -> None:
+    """Test ResolveSource context manager when input starts with a ZIP signature but is not a ZIP file."""
+    dummy_file = tmp_path / "test.ovpn"
+
+    dummy_file.write_bytes(b"PK\x03\x04 not really a zip")
 
     with ResolveSource(dummy_file) as resolved_src:
         assert resolved_src == dummy_file
@@ -44,24 +62,34 @@ def test_resolvesource_local_nonzip_file(mocker: MockerFixture, tmpdir: py.path.
     assert dummy_file.exists()
 
 
-def test_resolvesource_failure_badpath() -> None:
-    """Test ResolveSource context manager when input is a non-existent file."""
-    with pytest.raises(ValueError, match="Path does not exist"):
-        with ResolveSource(Path("bad_path")):
-            pass
+def test_resolvesource_local_zip_leading_data(tmp_path: Path, sample_zip: Path) -> None:
+    """Test ResolveSource context manager handling a ZIP file with leading data as a plain file."""
+    dummy_file = tmp_path / "test.exe"
+
+    dummy_file.write_bytes(b"#!/bin/sh\n" + sample_zip.read_bytes())
+
+    with ResolveSource(dummy_file) as resolved_src:
+        assert resolved_src == dummy_file
 
 
-def test_resolvesource_failure_badurn() -> None:
-    """Test ResolveSource context manager when input is a bad URN."""
-    with pytest.raises(ValueError, match=r"Only HTTP\(S\) supported as remote protocol"):
-        with ResolveSource("ftp://bad_host"):
+@pytest.mark.parametrize(
+    ("src", "error"),
+    [
+        (Path("bad_path"), "Path does not exist"),
+        ("ftp://bad_host", r"Only HTTP\(S\) supported as remote protocol"),
+    ],
+)
+def test_resolvesource_failure(src: SourceType, error: str) -> None:
+    """Test ResolveSource context manager when input is a non-existent file or a bad URN."""
+    with pytest.raises(ValueError, match=error):
+        with ResolveSource(src):
             pass
 
 
-def test_resolvesource_http_nonzip(mocker: MockerFixture, tmpdir: py.path.local) -> None:
+def test_resolvesource_http_nonzip(mocker: MockerFixture, tmp_path: Path) -> None:
     """Test ResolveSource context manager when input is HTTP non-zip file."""
     mocked_handledownload = mocker.patch("paranoid_openvpn.input_handlers.HandleDownload")
-    downloaded_path = Path(tmpdir / "dummy.ovpn")
+    downloaded_path = tmp_path / "dummy.ovpn"
 
     downloaded_path.touch()
     dummy_url = "http://does_not_matter"
@@ -73,28 +101,43 @@ def test_resolvesource_http_nonzip(mocker: MockerFixture, tmpdir: py.path.local)
         assert mocked_handledownload.called_with(dummy_url)
 
 
-def test_resolvesource_local_zip(mocker: MockerFixture, tmpdir: py.path.local) -> None:
+def test_resolvesource_http_in_memory_zip(mocker: MockerFixture, tmp_path: Path) -> None:
+    """Test ResolveSource context manager when input is a HTTP zip file kept in memory."""
+    mocked_handledownload = mocker.patch("paranoid_openvpn.input_handlers.HandleDownload")
+    mocked_handlezip = mocker.patch("paranoid_openvpn.input_handlers.HandleZip")
+
+    extracted_path = tmp_path
+    downloaded = io.BytesIO(b"PK\x05\x06")
+    dummy_url = "https://does_not_matter"
+
+    mocked_handledownload.return_value.__enter__.return_value = downloaded
+    mocked_handlezip.return_value.__enter__.return_value = extracted_path
+
+    with ResolveSource(dummy_url) as resolved_src:
+        assert resolved_src == extracted_path
+        mocked_handlezip.assert_called_once_with(downloaded)
+
+
+def test_resolvesource_local_zip(mocker: MockerFixture, tmp_path: Path, sample_zip: Path) -> None:
     """Test ResolveSource context manager when input is local zip file."""
     mocked_handlezip = mocker.patch("paranoid_openvpn.input_handlers.HandleZip")
-    extracted_path = Path(tmpdir)
-    dummy_zip = Path(tmpdir / "dummy.zip")
-    dummy_zip.touch()
+    extracted_path = tmp_path
 
     mocked_handlezip.return_value.__enter__.return_value = extracted_path
 
-    with ResolveSource(dummy_zip) as resolved_src:
+    with ResolveSource(sample_zip) as resolved_src:
         assert resolved_src == extracted_path
-        assert mocked_handlezip.called_with(dummy_zip)
+        assert mocked_handlezip.called_with(sample_zip)
 
 
-def test_resolvesource_remote_zip(mocker: MockerFixture, tmpdir: py.path.local) -> None:
+def test_resolvesource_remote_zip(mocker: MockerFixture, tmp_path: Path) -> None:
     """Test ResolveSource context manager when input is HTTP zip file."""
     mocked_handledownload = mocker.patch("paranoid_openvpn.input_handlers.HandleDownload")
     mocked_handlezip = mocker.patch("paranoid_openvpn.input_handlers.HandleZip")
 
-    extracted_path = Path(tmpdir)
-    dummy_zip = Path(tmpdir / "dummy.zip")
-    dummy_zip.touch()
+    extracted_path = tmp_path
+    dummy_zip = tmp_path / "dummy.zip"
+    ZipFile(dummy_zip, mode="w").close()
     dummy_url = "http://does_not_matter"
 
     mocked_handledownload.return_value.__enter__.return_value = dummy_zip
@@ -106,27 +149,53 @@ def test_resolvesource_remote_zip(mocker: MockerFixture, tmpdir: py.path.local)
         assert mocked_handlezip.called_with(dummy_zip)
 
 
-def test_handlezip(tmpdir: py.path.local) -> None:
+def test_handlezip(sample_zip: Path) -> None:
     """Test HandleZip correct operation."""
-    zip_loc = Path(tmpdir / "test.zip")
-    content = "This is a test"
+    with HandleZip(sample_zip) as extracted_dir:
+        extracted_file = extracted_dir / "test.txt"
+        assert extracted_file.is_file()
+
+        with extracted_file.open("rt") as f_in:
+            assert "This is a test" == f_in.read()
+
+    assert not extracted_dir.exists()
+
+
+def test_handlezip_nested(tmp_path: Path) -> None:
+    """Test HandleZip extracting many members that share parent directories."""
+    zip_loc = tmp_path / "test.zip"
 
     with ZipFile(zip_loc, mode="w") as temp_zip:
-        temp_zip.writestr("test.txt", content)
+        for i in range(50):
+            temp_zip.writestr(f"outer/inner{i % 3}/test{i}.txt", f"Test {i}")
 
     with HandleZip(zip_loc) as extracted_dir:
-        extracted_file = extracted_dir / "test.txt"
-        assert extracted_file.is_file()
+        for i in range(50):
+            extracted_file = extracted_dir / "outer" / f"inner{i % 3}" / f"test{i}.txt"
+            assert extracted_file.read_text() == f"Test {i}"
+
+    assert not extracted_dir.exists()
 
-        with extracted_file.open("rt") as f_in:
-            assert content == f_in.read()
+
+def test_handlezip_nested_in_memory() -> None:
+    """Test HandleZip extracting many members from a ZIP file held in memory."""
+    zip_contents = io.BytesIO()
+
+    with ZipFile(zip_contents, mode="w") as temp_zip:
+        for i in range(50):
+            temp_zip.writestr(f"outer/inner{i % 3}/test{i}.txt", f"Test {i}")
+
+    with HandleZip(zip_contents) as extracted_dir:
+        for i in range(50):
+            extracted_file = extracted_dir / "outer" / f"inner{i % 3}" / f"test{i}.txt"
+            assert extracted_file.read_text() == f"Test {i}"
 
     assert not extracted_dir.exists()
 
 
-def test_handlezip_error_badzip(tmpdir: py.path.local) -> None:
+def test_handlezip_error_badzip(tmp_path: Path) -> None:
     """Test HandleZip error when file is not a zip."""
-    zip_loc = Path(tmpdir / "test.zip")
+    zip_loc = tmp_path / "test.zip"
     content = "This is a test"
 
     with zip_loc.open("wt") as f_out:
@@ -137,15 +206,42 @@ def test_handlezip_error_badzip(tmpdir: py.path.local) -> None:
             pass
 
 
-def test_handledownload(mocker: MockerFixture) -> None:
+def test_handledownload(mocked_urlopen: MagicMock) -> None:
     """Test HandleDownload correct operation."""
-    mocked_urllib = mocker.patch("urllib.request.urlopen")
-    mocked_urllib.return_value.code = 200
-
     contents = b"This is a test"
-    mocked_urllib.return_value.read.side_effect = [contents, b""]
+    mocked_urlopen.return_value.read.side_effect = [contents, b""]
 
     with HandleDownload("https://does_not_matter") as download:
+        assert isinstance(download, Path)
+        with download.open("rb") as f_in:
+            assert contents == f_in.read()
+
+    assert not download.exists()
+
+
+def test_handledownload_in_memory_zip(mocked_urlopen: MagicMock) -> None:
+    """Test HandleDownload keeping a small ZIP file in memory."""
+    zip_contents = io.BytesIO()
+    with ZipFile(zip_contents, mode="w") as temp_zip:
+        temp_zip.writestr("test.txt", "This is a test")
+
+    contents = zip_contents.getvalue()
+    mocked_urlopen.return_value.headers = {"Content-Length": str(len(contents))}
+    mocked_urlopen.return_value.read.side_effect = [contents, b""]
+
+    with HandleDownload("https://does_not_matter", max_memory_size=len(contents)) as download:
+        assert isinstance(download, io.BytesIO)
+        assert download.read() == contents
+
+
+@pytest.mark.parametrize("contents", [b"This is a test", b"PK\x03\x04 not really a zip"])
+def test_handledownload_in_memory_nonzip(mocked_urlopen: MagicMock, contents: bytes) -> None:
+    """Test HandleDownload writing a small non-ZIP file to disk, even if it starts with a ZIP signature."""
+    mocked_urlopen.return_value.headers = {"Content-Length": str(len(contents))}
+    mocked_urlopen.return_value.read.side_effect = [contents, b""]
+
+    with HandleDownload("https://does_not_matter", max_memory_size=len(contents)) as download:
+        assert isinstance(download, Path)
         with download.open("rb") as f_in:
             assert contents == f_in.read()
 
@@ -159,34 +255,29 @@ def test_handledownload_error_not_http(mocker: MockerFixture) -> None:
             pass
 
 
-def test_handledownload_error_http404(mocker: MockerFixture) -> None:
+def test_handledownload_error_http404(mocked_urlopen: MagicMock) -> None:
     """Test HandleDownload error when a HTTP non-200 code is returned."""
-    mocked_urllib = mocker.patch("urllib.request.urlopen")
-    mocked_urllib.return_value.code = 404
+    mocked_urlopen.return_value.code = 404
 
     with pytest.raises(ValueError, match="Could not download remote file, HTTP error code: 404"):
         with HandleDownload("https://does_not_matter"):
             pass
 
 
-def test_handledownload_http_insecure(mocker: MockerFixture) -> None:
+def test_handledownload_http_insecure(mocked_urlopen: MagicMock) -> None:
     """Test HandleDownload warning when insecure HTTP is used."""
-    mocked_urllib = mocker.patch("urllib.request.urlopen")
-    mocked_urllib.return_value.code = 200
     contents = b"This is a test"
-    mocked_urllib.return_value.read.side_effect = [contents, b""]
+    mocked_urlopen.return_value.read.side_effect = [contents, b""]
 
     with pytest.warns(UserWarning, match="Downloading OpenVPN profiles over insecure connection"):
         with HandleDownload("http://does_not_matter"):
             pass
 
 
-def test_handledownload_error_reading(mocker: MockerFixture) -> None:
+def test_handledownload_error_reading(mocked_urlopen: MagicMock) -> None:
     """Test HandleDownload error when read throws an exception."""
-    mocked_urllib = mocker.patch("urllib.request.urlopen")
-    mocked_urllib.return_value.code = 200
     exc_contents = "Test contents"
-    mocked_urllib.return_value.read.side_effect = Exception(exc_contents)
+    mocked_urlopen.return_value.read.side_effect = Exception(exc_contents)
 
     with pytest.raises(Exception, match=exc_contents):
         with HandleDownload("https://does_not_matter"):
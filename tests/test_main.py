@@ -1,6 +1,5 @@
 from pathlib import Path
 
-import py
 import pytest
 from pytest_mock import MockerFixture
 
@@ -61,13 +60,33 @@ def test_process_profile_not_strong() -> None:
     assert test_config["tls-version-min"].value == "1.3 or-highest"
 
 
-def test_process_profile_warning_weak(tmpdir: py.path.local) -> None:
+def test_process_profile_warning_weak(tmp_path: Path) -> None:
     """Test process_profile() to ensure warning is emitted for weak ciphers."""
     with pytest.warns(UserWarning, match="has WEAK cipher strength!"):
         test_config = OVPNConfig([Parameter("cipher", "bf-cbc")])
         process_profile(test_config, TLSVersion.v1_3, ProviderExtensions.NONE)
 
 
+def test_process_profile_shared_settings() -> None:
+    """Test process_profile() inserts settings that no profile can change for the others."""
+    first = OVPNConfig([Parameter("cipher", "aes-256-cbc")])
+    second = OVPNConfig([Parameter("cipher", "aes-256-cbc")])
+    process_profile(first, TLSVersion.v1_3, ProviderExtensions.PIA)
+    process_profile(second, TLSVersion.v1_3, ProviderExtensions.PIA)
+    original = second["tls-cipher"].value
+
+    with pytest.raises(AttributeError, match="immutable"):
+        first["tls-cipher"].value = "CHANGED"
+
+    first.add(Parameter("tls-cipher", "CHANGED"), exist_ok=True)
+    assert first["tls-cipher"].value == "CHANGED"
+    assert second["tls-cipher"].value == original
+
+    third = OVPNConfig([Parameter("cipher", "aes-256-cbc")])
+    process_profile(third, TLSVersion.v1_3, ProviderExtensions.PIA)
+    assert third["tls-cipher"].value == original
+
+
 def test_process_profile_pia(mocker: MockerFixture) -> None:
     """Test process_profile() with PIA flag."""
     process_pia_spy = mocker.patch("paranoid_openvpn.main.process_pia", wraps=process_pia)
@@ -89,11 +108,11 @@ def test_process_profile_pia(mocker: MockerFixture) -> None:
     assert test_config["data-ciphers"].value == "AES-256-GCM:CHACHA20-POLY1305:AES-256-CBC"
 
 
-def test_process_profiles_file(tmpdir: py.path.local) -> None:
+def test_process_profiles_file(tmp_path: Path) -> None:
     """Test process_profiles() with a single file input."""
     test_config = OVPNConfig([Parameter("cipher", "aes-256-cbc")])
-    test_file = Path(tmpdir / "test.ovpn")
-    out_file = Path(tmpdir / "out" / "test.opvpn")
+    test_file = tmp_path / "test.ovpn"
+    out_file = tmp_path / "out" / "test.opvpn"
 
     test_config.write(test_file)
 
@@ -110,40 +129,86 @@ def test_process_profiles_file(tmpdir: py.path.local) -> None:
     assert out_config["tls-version-min"].value == "1.3 or-highest"
 
 
-def test_process_profiles_error_badpath(tmpdir: py.path.local) -> None:
+def test_process_profiles_error_badpath(tmp_path: Path) -> None:
     """Test process_profiles() raising an exception when the source does not exist."""
-    test_file = Path(tmpdir / "test.ovpn")
-    out_file = Path(tmpdir / "test_out.ovpn")
+    test_file = tmp_path / "test.ovpn"
+    out_file = tmp_path / "test_out.ovpn"
 
     with pytest.raises(ValueError, match="Source does not exist"):
         process_profiles(test_file, out_file, TLSVersion.v1_3, ProviderExtensions.NONE)
 
 
-def test_process_profiles_dir(mocker: MockerFixture, tmpdir: py.path.local) -> None:
+def test_process_profiles_dir(mocker: MockerFixture, tmp_path: Path) -> None:
     """Test process_profiles() with a directory input."""
     mock_process_profile = mocker.patch("paranoid_openvpn.main.process_profile")
 
-    test_dir = Path(tmpdir / "in")
+    test_dir = tmp_path / "in"
     test_dir.mkdir()
 
-    out_dir = Path(tmpdir / "out")
+    out_dir = tmp_path / "out"
 
     (test_dir / "test1.ovpn").touch()
     (test_dir / "test2.ovpn").touch()
     (test_dir / "other.pem").touch()
+    (test_dir / "nested").mkdir()
+    (test_dir / "nested" / "test3.ovpn").touch()
 
     process_profiles(test_dir, out_dir, TLSVersion.v1_3, ProviderExtensions.NONE)
 
     assert (out_dir / "test1.ovpn").is_file()
     assert (out_dir / "test2.ovpn").is_file()
     assert (out_dir / "other.pem").is_file()
+    assert (out_dir / "nested" / "test3.ovpn").is_file()
+
+    assert mock_process_profile.call_count == 3
+
+
+def test_process_profiles_dir_keeps_mode(tmp_path: Path) -> None:
+    """Test process_profiles() keeping the permissions of the files it copies."""
+    test_dir = tmp_path / "in"
+    test_dir.mkdir()
+
+    out_dir = tmp_path / "out"
+
+    key_file = test_dir / "client.key"
+    key_file.touch()
+    key_file.chmod(0o600)
+
+    process_profiles(test_dir, out_dir, TLSVersion.v1_3, ProviderExtensions.NONE)
+
+    assert (out_dir / "client.key").stat().st_mode & 0o777 == 0o600
 
-    assert mock_process_profile.call_count == 2
 
+def test_process_profiles_dir_parallel(mocker: MockerFixture, tmp_path: Path) -> None:
+    """Test process_profiles() with a directory input large enough to use worker processes."""
+    mocker.patch("paranoid_openvpn.main.MIN_PARALLEL_PROFILES", 2)
 
-def test_process_profiles_error_nested_src_dst(tmpdir: py.path.local) -> None:
+    test_dir = tmp_path / "in"
+    test_dir.mkdir()
+
+    out_dir = tmp_path / "out"
+
+    test_config = OVPNConfig([Parameter("cipher", "aes-256-cbc")])
+    for i in range(3):
+        test_config.write(test_dir / f"test{i}.ovpn")
+
+    process_profiles(test_dir, out_dir, TLSVersion.v1_3, ProviderExtensions.NONE)
+
+    for i in range(3):
+        out_config = OVPNConfig.read(out_dir / f"test{i}.ovpn")
+        assert out_config["tls-version-min"].value == "1.3 or-highest"
+        assert out_config["tls-groups"].value == "secp521r1:X448:secp384r1:secp256r1:X25519"
+
+
+def test_process_profiles_error_nested_src_dst(tmp_path: Path) -> None:
     """Test process_profiles() raising an exception when dest is subdir of source."""
-    out_dir = Path(tmpdir / "out")
+    out_dir = tmp_path / "out"
+
+    with pytest.raises(ValueError, match="dest path cannot be relative to src path"):
+        process_profiles(tmp_path, out_dir, TLSVersion.v1_3, ProviderExtensions.NONE)
+
+    with pytest.raises(ValueError, match="dest path cannot be relative to src path"):
+        process_profiles(tmp_path, tmp_path, TLSVersion.v1_3, ProviderExtensions.NONE)
 
     with pytest.raises(ValueError, match="dest path cannot be relative to src path"):
-        process_profiles(Path(tmpdir), out_dir, TLSVersion.v1_3, ProviderExtensions.NONE)
+        process_profiles(tmp_path, tmp_path / "in" / ".." / "out", TLSVersion.v1_3, ProviderExtensions.NONE)
@@ -1,18 +1,13 @@
+import copy
 import io
-import sys
+import pickle  # noqa: S403
 from pathlib import Path
+from typing import Final
 
-import py
 import pytest
 
 from paranoid_openvpn import profile_parser, types
 
-if sys.version_info >= (3, 8):
-    from typing import Final
-else:
-    from typing_extensions import Final
-
-
 INLINE_TAGS: Final = {
     "<crl-verify>",
     "<cert>",
@@ -27,6 +22,9 @@ INLINE_TAGS: Final = {
     "<http-proxy-user-pass>",
 }
 
+# Each inline tag with its matching close tag, in a stable order
+INLINE_PAIRS: Final = tuple((tag, "</{}".format(tag[1:])) for tag in sorted(INLINE_TAGS))
+
 TEST_DIR = Path(__file__).resolve().parent
 
 
@@ -121,15 +119,30 @@ def test_inline_read_failure() -> None:
         profile_parser.Inline.read(["<ca>", "</ca"])
 
 
-def test_inline_read() -> None:
+@pytest.mark.parametrize(("tag", "close_tag"), INLINE_PAIRS)
+def test_inline_read(tag: str, close_tag: str) -> None:
     """Test Inline.read()."""
-    for tag in INLINE_TAGS:
-        close_tag = "</{}".format(tag[1:])
-        content = [tag, "Line 1", "Line 2\n", close_tag]
+    content = [tag, "Line 1", "Line 2\n", close_tag]
+
+    inline = profile_parser.Inline.read(content)
+    assert inline.name == tag
+    assert inline.value == "Line 1\nLine 2"
+
 
-        inline = profile_parser.Inline.read(content)
-        assert inline.name == tag
-        assert inline.value == "Line 1\nLine 2"
+def test_inline_read_unlisted_tag() -> None:
+    """Test Inline.read() with a well-formed tag that isn't in INLINE_TAGS."""
+    inline = profile_parser.Inline.read(["<connection>", "remote server 1194", "</connection>"])
+    assert inline.name == "<connection>"
+    assert inline.value == "remote server 1194"
+
+
+def test_inline_read_offset() -> None:
+    """Test Inline.read() starting part way through the config lines."""
+    content = ["client", "<ca>", "Line 1", "</ca>", "<key>", "Line 2", "</key>"]
+
+    inline = profile_parser.Inline.read(content, 4)
+    assert inline.name == "<key>"
+    assert inline.value == "Line 2"
 
 
 def test_inline_write() -> None:
@@ -142,6 +155,14 @@ def test_inline_write() -> None:
     assert dummy_io.getvalue() == "<ca>\nLine 1\nLine 2\n</ca>\n"
 
 
+def test_inline_to_str() -> None:
+    """Test Inline.to_str()."""
+    contents = ["Line 1", "Line 2\n"]
+    inline = profile_parser.Inline("<ca>", contents)
+
+    assert inline.to_str() == "<ca>\nLine 1\nLine 2\n</ca>\n"
+
+
 def test_inline___len__() -> None:
     """Test Inline.__len__()."""
     contents = ["Line 1", "Line 2\n"]
@@ -205,6 +226,36 @@ def test_parameter_write() -> None:
     assert dummy_io.getvalue() == "dev tun\n"
 
 
+def test_parameter_immutable() -> None:
+    """Test Parameter rejects changes once constructed."""
+    config = profile_parser.OVPNConfig([profile_parser.Parameter("cipher", "AES-256-CBC")])
+    assert config.cipher_strength() == types.CipherStrength.STRONG
+
+    with pytest.raises(AttributeError, match="Parameter is immutable, cannot set value"):
+        config["cipher"].value = "BF-CBC"
+
+    with pytest.raises(AttributeError, match="Parameter is immutable, cannot set name"):
+        config["cipher"].name = "auth"
+
+    with pytest.raises(AttributeError, match="Parameter is immutable, cannot delete value"):
+        del config["cipher"].value
+
+    assert config["cipher"].value == "AES-256-CBC"
+    assert config.cipher_strength() == types.CipherStrength.STRONG
+
+
+def test_ovpnconfigparam_pickle() -> None:
+    """Test immutable elements can still be copied and pickled."""
+    for param in [
+        profile_parser.BlankLine(),
+        profile_parser.Comment("# Comment"),
+        profile_parser.Inline("<ca>", ["Line 1", "Line 2"]),
+        profile_parser.Parameter("dev", "tun"),
+    ]:
+        assert copy.copy(param) == param
+        assert pickle.loads(pickle.dumps(param)) == param  # noqa: S301
+
+
 def test_parameter___len__() -> None:
     """Test Parameter.__len__()."""
     param = profile_parser.Parameter("client")
@@ -221,13 +272,13 @@ def test_ovpnconfig_constructor() -> None:
     assert config.params == params
 
 
-def test_ovpnconfig_read(tmpdir: py.path.local) -> None:
+def test_ovpnconfig_read(tmp_path: Path) -> None:
     """Test OVPNConfig.read()."""
     simple_config = [profile_parser.Comment("# Line 1"), profile_parser.Parameter("client")]
 
     config_lines = ["# Line 1", "client"]
 
-    temp_file = Path(tmpdir / "temp.ovpn")
+    temp_file = tmp_path / "temp.ovpn"
     with temp_file.open("wt") as f_out:
         f_out.write("\n".join(config_lines))
 
@@ -236,7 +287,7 @@ def test_ovpnconfig_read(tmpdir: py.path.local) -> None:
 
     config_lines.append("-bogus-")
 
-    temp_file = Path(tmpdir / "temp.ovpn")
+    temp_file = tmp_path / "temp.ovpn"
     with temp_file.open("wt") as f_out:
         f_out.write("\n".join(config_lines))
 
@@ -244,6 +295,46 @@ def test_ovpnconfig_read(tmpdir: py.path.local) -> None:
         profile_parser.OVPNConfig.read(temp_file)
 
 
+def test_ovpnconfig_read_all_elements(tmp_path: Path) -> None:
+    """Test OVPNConfig.read() with every element type."""
+    config_lines = ["; Line 1", "", "dev tun", "<ca>", "Line 2", "</ca>"]
+
+    temp_file = tmp_path / "temp.ovpn"
+    temp_file.write_text("\n".join(config_lines))
+
+    config = profile_parser.OVPNConfig.read(temp_file)
+    assert config.params == [
+        profile_parser.Comment("; Line 1"),
+        profile_parser.BlankLine(),
+        profile_parser.Parameter("dev", "tun"),
+        profile_parser.Inline("<ca>", ["Line 2"]),
+    ]
+
+    temp_file.write_text("\n".join(config_lines[:-1]))
+
+    with pytest.raises(ValueError, match="Unknown config file line <ca>"):
+        profile_parser.OVPNConfig.read(temp_file)
+
+
+def test_ovpnconfig_read_after_inline(tmp_path: Path) -> None:
+    """Test OVPNConfig.read() resumes normal parsing once an inline tag is closed."""
+    config_lines = ["<ca>", "Line 1", "Line 2", "</ca>", "client", "<bad tag>"]
+
+    temp_file = tmp_path / "temp.ovpn"
+    temp_file.write_text("\n".join(config_lines[:-1]))
+
+    config = profile_parser.OVPNConfig.read(temp_file)
+    assert config.params == [
+        profile_parser.Inline("<ca>", ["Line 1", "Line 2"]),
+        profile_parser.Parameter("client"),
+    ]
+
+    temp_file.write_text("\n".join(config_lines))
+
+    with pytest.raises(ValueError, match="Unknown config file line <bad tag>"):
+        profile_parser.OVPNConfig.read(temp_file)
+
+
 def test_ovpnconfig_add() -> None:
     """Test OVPNConfig.add()."""
     cipher = profile_parser.Parameter("cipher", "AES-256-CBC")
@@ -271,7 +362,7 @@ def test_ovpnconfig_add() -> None:
     config.add(profile_parser.Comment("# Comment"))
 
 
-def test_ovpnconfig_write(tmpdir: py.path.local) -> None:
+def test_ovpnconfig_write(tmp_path: Path) -> None:
     """Test OVPNConfig.write()."""
     config = profile_parser.OVPNConfig(
         [
@@ -282,7 +373,7 @@ def test_ovpnconfig_write(tmpdir: py.path.local) -> None:
         ]
     )
 
-    out_file = Path(tmpdir / "test.ovpn")
+    out_file = tmp_path / "test.ovpn"
     config.write(out_file)
 
     with out_file.open("rt") as f_in:
@@ -333,12 +424,60 @@ def test_ovpnconfig___delitem__() -> None:
         del config[None]  # type: ignore
 
 
+def test_ovpnconfig_name_index() -> None:
+    """Test OVPNConfig name lookups stay consistent as elements are added and removed."""
+    first = profile_parser.Parameter("remote", "server1 1194")
+    second = profile_parser.Parameter("remote", "server2 1194")
+    comment = profile_parser.Comment("# Comment")
+    config = profile_parser.OVPNConfig([first, comment, second])
+
+    assert config["remote"] is first
+    assert config["# Comment"] is comment
+    del config[0]
+    assert config["remote"] is second
+    del config["remote"]
+    assert "remote" not in config
+
+    config.insert(0, profile_parser.Parameter("cipher", "AES-256-CBC"))
+    config.add(profile_parser.Parameter("cipher", "AES-128-CBC"), exist_ok=True)
+    assert config["cipher"].value == "AES-128-CBC"
+
+    del config["# Comment"]
+    assert "# Comment" not in config
+
+    # Duplicated comments stay reachable until the last one is removed
+    config.add(profile_parser.Comment("# Comment"))
+    config.add(profile_parser.Comment("# Comment"))
+    del config["# Comment"]
+    assert "# Comment" in config
+    del config["# Comment"]
+    assert "# Comment" not in config
+
+
+def test_ovpnconfig_delete_many() -> None:
+    """Test OVPNConfig.delete_many()."""
+    cipher = profile_parser.Parameter("cipher", "AES-256-CBC")
+    client = profile_parser.Parameter("client")
+    auth = profile_parser.Parameter("auth", "SHA256")
+    config = profile_parser.OVPNConfig([cipher, client, auth])
+
+    config.delete_many(["cipher", "auth", "dummy"])
+    assert config.params == [client]
+    assert "cipher" not in config
+    assert "auth" not in config
+
+
 def test_ovpnconfig_index() -> None:
     """Test OVPNConfig.index()."""
     params = [profile_parser.Parameter("cipher", "AES-256-CBC"), profile_parser.Parameter("hash", "sha256")]
     config = profile_parser.OVPNConfig(params)
 
     assert config.index("cipher") == 0
+    assert config.index("hash", 1) == 0
+    assert config.index("hash", 0, 5) == 1
+
+    with pytest.raises(KeyError, match="hash does not exist"):
+        config.index("hash", 0, 1)
 
     with pytest.raises(KeyError, match="dummy does not exist"):
         config.index("dummy")
@@ -359,6 +498,46 @@ def test_ovpnconfig_insert() -> None:
         config.insert(2, param)
 
 
+def test_ovpnconfig_insert_many() -> None:
+    """Test OVPNConfig.insert_many()."""
+    cipher = profile_parser.Parameter("cipher", "AES-256-CBC")
+    client = profile_parser.Parameter("client")
+    config = profile_parser.OVPNConfig([cipher, client])
+
+    comment = profile_parser.Comment("# Comment")
+    auth = profile_parser.Parameter("auth", "SHA256")
+    config.insert_many(1, [comment, auth, comment])
+    assert config.params == [cipher, comment, auth, comment, client]
+
+    with pytest.raises(KeyError, match="auth already exists"):
+        config.insert_many(0, [profile_parser.Parameter("auth", "SHA512")])
+
+    with pytest.raises(KeyError, match="hash already exists"):
+        config.insert_many(0, [profile_parser.Parameter("hash", "sha256"), profile_parser.Parameter("hash", "sha1")])
+
+    assert config.params == [cipher, comment, auth, comment, client]
+
+
+def test_ovpnconfig_replace_block() -> None:
+    """Test OVPNConfig.replace_block()."""
+    client = profile_parser.Parameter("client")
+    cipher = profile_parser.Parameter("cipher", "AES-256-CBC")
+    auth = profile_parser.Parameter("auth", "SHA256")
+    inline = profile_parser.Inline("<ca>", ["Line 1"])
+    config = profile_parser.OVPNConfig([client, cipher, auth, inline])
+
+    new_cipher = profile_parser.Parameter("cipher", "AES-256-GCM")
+    comment = profile_parser.Comment("# Comment")
+    config.replace_block(["cipher", "auth", "dummy"], 3, [comment, new_cipher])
+    assert config.params == [client, comment, new_cipher, inline]
+
+    with pytest.raises(KeyError, match="client already exists"):
+        config.replace_block(["cipher"], 0, [profile_parser.Parameter("client")])
+
+    # The config is left untouched when the replacement fails
+    assert config.params == [client, comment, new_cipher, inline]
+
+
 def test_ovpnconfig_last_before_inline() -> None:
     """Test OVPNConfig.last_before_inline()."""
     contents = ["Line 1", "Line 2\n"]
@@ -386,6 +565,31 @@ def test_ovpnconfig_cipher_strength() -> None:
     config = profile_parser.OVPNConfig([profile_parser.Parameter("cipher", "BF-CBC")])
     assert config.cipher_strength() == types.CipherStrength.WEAK
 
+    config = profile_parser.OVPNConfig([profile_parser.Parameter("cipher", "chacha20-poly1305")])
+    assert config.cipher_strength() == types.CipherStrength.STRONG
+
+    config = profile_parser.OVPNConfig([profile_parser.Parameter("cipher", "SM4-CBC")])
+    assert config.cipher_strength() == types.CipherStrength.ACCEPTABLE
+
+    config = profile_parser.OVPNConfig([profile_parser.Parameter("cipher", "AES-256-XTS")])
+    assert config.cipher_strength() == types.CipherStrength.STRONG
+
+
+def test_ovpnconfig_cipher_strength_cache() -> None:
+    """Test OVPNConfig.cipher_strength() recomputes once the cipher changes."""
+    config = profile_parser.OVPNConfig([profile_parser.Parameter("cipher", "AES-256-CBC")])
+    assert config.cipher_strength() == types.CipherStrength.STRONG
+
+    config.add(profile_parser.Parameter("cipher", "AES-128-CBC"), exist_ok=True)
+    assert config.cipher_strength() == types.CipherStrength.ACCEPTABLE
+
+    config.replace_block(["cipher"], 0, [profile_parser.Parameter("cipher", "AES-192-CBC")])
+    assert config.cipher_strength() == types.CipherStrength.MEDIUM
+
+    del config["cipher"]
+    config.insert(0, profile_parser.Parameter("cipher", "BF-CBC"))
+    assert config.cipher_strength() == types.CipherStrength.WEAK
+
 
 def test_ovpnconfigparam_cmp_error() -> None:
     """Test OVPNParam.__eq__()."""
@@ -0,0 +1,30 @@
+import pytest
+
+from paranoid_openvpn.types import CipherStrength, ProviderExtensions, TLSVersion
+
+
+def test_tlsversion_from_value() -> None:
+    """Test TLSVersion.from_value()."""
+    for version in TLSVersion:
+        assert TLSVersion.from_value(version.value) is version
+
+    with pytest.raises(ValueError, match="'1.4' is not a valid TLSVersion"):
+        TLSVersion.from_value("1.4")
+
+
+def test_tlsversion_str() -> None:
+    """Test TLSVersion members behave as their version strings."""
+    assert isinstance(TLSVersion.v1_2, str)
+    assert str(TLSVersion.v1_2) == "1.2"
+    assert f"{TLSVersion.v1_3} or-highest" == "1.3 or-highest"
+
+
+def test_cipherstrength_order() -> None:
+    """Test CipherStrength members are ordered weakest to strongest."""
+    assert CipherStrength.WEAK < CipherStrength.ACCEPTABLE < CipherStrength.MEDIUM < CipherStrength.STRONG
+
+
+def test_providerextensions_not_int() -> None:
+    """Test ProviderExtensions members are not ints, so they never compare equal to ints or other int enums."""
+    assert not isinstance(ProviderExtensions.NONE, int)
+    assert not isinstance(ProviderExtensions.PIA, int)